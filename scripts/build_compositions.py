@@ -0,0 +1,254 @@
+import argparse
+import csv
+from collections import defaultdict
+from itertools import groupby
+from pathlib import Path
+
+from geojson_writer import write_feature_collection
+from label_resolver import LabelResolver, write_suggestions
+
+MANIFEST = Path("data/composition_snapshots.csv")
+DENMAP = Path("data/mappings/denomination_map.csv")
+STATE_CODES = Path("data/mappings/state_codes.csv")
+OUT_LONG = Path("data/processed/composition_long.csv")
+OUT_GEOJSON_DIR = Path("data/processed/compositions")
+OUT_SUGGESTIONS = Path("data/processed/composition_label_suggestions.csv")
+
+COMPOSITION_FIELDS = [
+    "year",
+    "origin_region",
+    "destination_colony",
+    "belief_group",
+    "percent_share",
+    "congregations_total",
+    "membership_rate",
+    "membership_rate_whites",
+    "source",
+    "documentation_url",
+]
+STAT_FIELDS = ("congregations_total", "membership_rate", "membership_rate_whites")
+
+
+def load_map(path: Path, source_field: str, target_field: str):
+    mapping = {}
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            mapping[row[source_field].strip()] = row[target_field].strip()
+    return mapping
+
+
+def load_state_codes(path: Path):
+    names = {}
+    coords = {}
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            code = row["code"].strip()
+            state = row["state"].strip()
+            names[code] = state
+            names[state] = state
+            coords[state] = (float(row["lon"]), float(row["lat"]))
+    return names, coords
+
+
+def load_manifest(path: Path, years=None):
+    # Rows with a blank year (multi-year files) are always kept; their records
+    # are filtered by year in iter_profile_records.
+    snapshots = []
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            snapshot = {key: (value or "").strip() for key, value in row.items()}
+            if years and snapshot["year"] and int(snapshot["year"]) not in years:
+                continue
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def parse_percent(value: str) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def parse_stat(value: str, cast):
+    try:
+        return cast(float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def read_csv(path: Path):
+    with path.open(newline="", encoding="utf-8") as handle:
+        yield from csv.DictReader(handle)
+
+
+def iter_profile_records(snapshot, state_names, years=None):
+    # Yields (year, state, raw_label, percent) regardless of the source layout,
+    # skipping records outside `years` when it is given.
+    # "wide" is the Finke & Stark Table 3 shape (one column per state code);
+    # "long" has one row per state/denomination with an optional year column,
+    # which is how multi-year compilations such as ARDA are transcribed.
+    path = Path(snapshot["profiles_path"])
+    if not path.exists():
+        raise SystemExit(f"Missing {path} (listed in {MANIFEST})")
+    default_year = snapshot["year"]
+    if snapshot["layout"] == "wide":
+        if not default_year:
+            raise SystemExit(f"{snapshot['source_id']} in {MANIFEST} is a wide table and needs a year")
+        for row in read_csv(path):
+            label = (row.get("denomination") or "").strip()
+            for column, value in row.items():
+                state = state_names.get((column or "").strip())
+                if state and (not years or int(default_year) in years):
+                    yield int(default_year), state, label, parse_percent((value or "").strip())
+    elif snapshot["layout"] == "long":
+        for row in read_csv(path):
+            state = state_names.get((row.get("state") or "").strip())
+            year = (row.get("year") or default_year).strip()
+            if not state or not year or (years and int(float(year)) not in years):
+                continue
+            label = (row.get("denomination") or "").strip()
+            yield int(float(year)), state, label, parse_percent((row.get("percent") or "").strip())
+    else:
+        raise SystemExit(f"Unknown layout {snapshot['layout']!r} for {path}")
+
+
+def load_stats(snapshot, state_names, stats):
+    if not snapshot["stats_path"]:
+        return
+    path = Path(snapshot["stats_path"])
+    if not path.exists():
+        raise SystemExit(f"Missing {path} (listed in {MANIFEST})")
+    for row in read_csv(path):
+        # Region and national rows are not states and fall out of the lookup
+        state = state_names.get((row.get("colony") or row.get("state") or "").strip())
+        year = (row.get("year") or snapshot["year"]).strip()
+        if not state or not year:
+            continue
+        stats[(int(float(year)), state)] = {field: (row.get(field) or "").strip() for field in STAT_FIELDS}
+
+
+def build_compositions(snapshots, belief_resolver, state_names, years=None):
+    # Every snapshot's records are joined against the belief mapping, the
+    # membership-rate table and the snapshot provenance in a single pass;
+    # lookups are keyed dicts, so the cost is linear in the total row count.
+    # Labels that map to the same belief within one snapshot are summed, but
+    # two snapshots may not both cover the same (year, state).
+    stats = {}
+    for snapshot in snapshots:
+        load_stats(snapshot, state_names, stats)
+
+    shares = defaultdict(float)
+    provenance = {}
+    state_order = {}
+    for snapshot in snapshots:
+        for year, state, label, percent in iter_profile_records(snapshot, state_names, years):
+            belief = belief_resolver.resolve(label)
+            owner = provenance.setdefault((year, state), snapshot)
+            if owner is not snapshot:
+                raise SystemExit(
+                    f"{state} {year} is covered by both {owner['source_id']} and {snapshot['source_id']} "
+                    f"in {MANIFEST}; drop the overlapping rows from one of them"
+                )
+            shares[(year, state, belief)] += percent
+            state_order.setdefault((year, state), len(state_order))
+
+    grouped = defaultdict(list)
+    for (year, state, belief), percent in shares.items():
+        grouped[(year, state)].append((belief, percent))
+
+    rows = []
+    for year, state in sorted(grouped, key=lambda key: (key[0], state_order[key])):
+        snapshot = provenance[(year, state)]
+        year_stats = stats.get((year, state), {})
+        for belief, percent in sorted(grouped[(year, state)], key=lambda item: item[1], reverse=True):
+            if percent == 0:
+                continue
+            rows.append(
+                {
+                    "year": str(year),
+                    "origin_region": "",
+                    "destination_colony": state,
+                    "belief_group": belief,
+                    "percent_share": f"{percent:.2f}".rstrip("0").rstrip("."),
+                    "congregations_total": year_stats.get("congregations_total", ""),
+                    "membership_rate": year_stats.get("membership_rate", ""),
+                    "membership_rate_whites": year_stats.get("membership_rate_whites", ""),
+                    "source": snapshot["source"],
+                    "documentation_url": snapshot["documentation_url"],
+                }
+            )
+    return rows
+
+
+def write_composition_csv(path: Path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=COMPOSITION_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def iter_year_features(rows, coords):
+    for (year, state), group in groupby(rows, key=lambda row: (row["year"], row["destination_colony"])):
+        yield composition_feature(year, state, list(group), coords)
+
+
+def composition_feature(year: str, state: str, rows, coords):
+    percentages = {row["belief_group"]: float(row["percent_share"]) for row in rows}
+    # Rows arrive largest share first with ties in source order, so the first
+    # row is dominant: ties go to the belief seen first, as in colony_feature
+    first = rows[0]
+    dominant_belief = first["belief_group"]
+    point = coords.get(state)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [point[0], point[1]]} if point else None,
+        "properties": {
+            "year": int(year),
+            "colony": state,
+            "dominant_belief": dominant_belief,
+            "dominant_share": percentages[dominant_belief],
+            "percentages": percentages,
+            "congregations_total": parse_stat(first["congregations_total"], int),
+            "membership_rate": parse_stat(first["membership_rate"], float),
+            "source": first["source"],
+            "documentation_url": first["documentation_url"],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build denominational compositions for every listed snapshot.")
+    parser.add_argument("--year", type=int, action="append", help="limit to these snapshot years")
+    args = parser.parse_args()
+
+    belief_resolver = LabelResolver(load_map(DENMAP, "source_label", "belief_group"), DENMAP.name)
+    state_names, coords = load_state_codes(STATE_CODES)
+    years = set(args.year or [])
+    rows = build_compositions(load_manifest(MANIFEST, years), belief_resolver, state_names, years)
+    write_composition_csv(OUT_LONG, rows)
+    write_suggestions(OUT_SUGGESTIONS, [belief_resolver])
+
+    OUT_GEOJSON_DIR.mkdir(parents=True, exist_ok=True)
+    years = []
+    for year, year_group in groupby(rows, key=lambda row: row["year"]):
+        year_rows = list(year_group)
+        years.append(year)
+        write_feature_collection(
+            OUT_GEOJSON_DIR / f"composition_{year}.geojson",
+            iter_year_features(year_rows, coords),
+            metadata={
+                "description": f"State/colony denominational percentages for {year}",
+                "source": year_rows[0]["source"],
+                "generated_by": "scripts/build_compositions.py",
+            },
+        )
+    print(f"Wrote {OUT_LONG} and {len(years)} GeoJSON snapshot(s) to {OUT_GEOJSON_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import csv
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from label_resolver import normalize_label
+
+YEAR_WINDOW = 10
+NAME_THRESHOLD = 0.85
+# A weaker name match is accepted when the towns agree
+SAME_TOWN_NAME_THRESHOLD = 0.6
+# Score given when one name's distinctive words are all part of the other's,
+# e.g. "Huguenot Church of Charleston" inside the full French church name.
+# It is below NAME_THRESHOLD, so containment only merges when the towns agree.
+CONTAINMENT_SCORE = 0.75
+TOWN_THRESHOLD = 0.85
+GENERIC_NAME_WORDS = {
+    "the", "of", "in", "at", "and", "st", "saint", "s",
+    "church", "congregation", "meeting", "parish", "chapel",
+    "synagogue", "mission", "society",
+}
+# Words that tell congregations in the same town apart ("First" and "Second
+# Church", a Monthly and a Preparative Meeting). They are left out of the name
+# key and compared on their own: names carrying different ones never merge.
+QUALIFIER_WORDS = {
+    "first", "second", "third", "fourth", "fifth", "sixth",
+    "1st", "2nd", "3rd", "4th", "5th", "6th",
+    "north", "south", "east", "west", "upper", "lower",
+    "monthly", "preparative", "quarterly", "yearly",
+}
+REPORT_FIELDS = [
+    "cluster",
+    "action",
+    "source_file",
+    "name",
+    "town",
+    "year",
+    "colony",
+    "belief",
+    "name_score",
+    "source_url",
+]
+
+
+def name_key(name: str, belief: str) -> str:
+    # Words shared by every name in a block (the belief itself, "church", ...)
+    # say nothing about which congregation a record is. A name made only of
+    # such words ("First Church") has an empty key.
+    generic = GENERIC_NAME_WORDS | QUALIFIER_WORDS | set(normalize_label(belief).split())
+    return " ".join(token for token in normalize_label(name).split() if token not in generic)
+
+
+def town_key(town: str) -> str:
+    # "Charleston" and "Charleston (Berkeley County)" are the same place
+    return normalize_label(town.split("(")[0])
+
+
+def similarity(left: str, right: str) -> float:
+    if not left or not right:
+        return 0.0
+    if left == right:
+        return 1.0
+    score = SequenceMatcher(None, left, right).ratio()
+    left_tokens, right_tokens = set(left.split()), set(right.split())
+    if left_tokens <= right_tokens or right_tokens <= left_tokens:
+        score = max(score, CONTAINMENT_SCORE)
+    return score
+
+
+def qualifiers(name: str):
+    return frozenset(normalize_label(name).split()) & QUALIFIER_WORDS
+
+
+def is_duplicate(left, right):
+    if left["qualifiers"] and right["qualifiers"] and left["qualifiers"] != right["qualifiers"]:
+        return 0.0
+    same_town = False
+    if left["town_key"] and right["town_key"]:
+        # Identical names in different towns are different congregations
+        if similarity(left["town_key"], right["town_key"]) < TOWN_THRESHOLD:
+            return 0.0
+        same_town = True
+    if not left["name_key"] or not right["name_key"]:
+        # Nothing distinctive in the name, so only the town can tie them
+        return CONTAINMENT_SCORE if same_town else 0.0
+    name_score = similarity(left["name_key"], right["name_key"])
+    if name_score >= NAME_THRESHOLD:
+        return name_score
+    if same_town and name_score >= SAME_TOWN_NAME_THRESHOLD:
+        return name_score
+    return 0.0
+
+
+def find(parents, index):
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+
+def window_pairs(records, members, others):
+    # Pairs from two year-sorted position lists that lie within YEAR_WINDOW
+    years = [records[position]["year"] for position in others]
+    for position in members:
+        year = records[position]["year"]
+        start = bisect_left(years, year - YEAR_WINDOW)
+        end = bisect_right(years, year + YEAR_WINDOW)
+        for other in others[start:end]:
+            if members is not others or other > position:
+                yield position, other
+
+
+def dedupe_records(records):
+    # Candidate pairs only come from the same (colony, belief, town) block and
+    # lie within YEAR_WINDOW of each other, so comparisons grow with the size
+    # of a single town's decade rather than a whole colony's. Records without
+    # a town are the only ones compared across town blocks.
+    for record in records:
+        record["name_key"] = name_key(record["name"], record["belief"])
+        record["town_key"] = town_key(record["town"])
+        record["qualifiers"] = qualifiers(record["name"])
+
+    blocks = defaultdict(lambda: defaultdict(list))
+    for position, record in enumerate(records):
+        blocks[(record["colony"], record["belief"])][record["town_key"]].append(position)
+
+    parents = list(range(len(records)))
+    scores = {}
+    for towns in blocks.values():
+        for members in towns.values():
+            members.sort(key=lambda position: records[position]["year"])
+        candidates = [pair for members in towns.values() for pair in window_pairs(records, members, members)]
+        if "" in towns:
+            for town, members in towns.items():
+                if town:
+                    candidates.extend(window_pairs(records, towns[""], members))
+        for position, other in candidates:
+            score = is_duplicate(records[position], records[other])
+            if score:
+                later = max(position, other, key=lambda index: (records[index]["year"], index))
+                parents[find(parents, other)] = find(parents, position)
+                scores[later] = max(scores.get(later, 0.0), score)
+
+    clusters = defaultdict(list)
+    for position in range(len(records)):
+        clusters[find(parents, position)].append(position)
+
+    merged = []
+    report = []
+    cluster_id = 0
+    for members in clusters.values():
+        if len(members) == 1:
+            merged.append(records[members[0]])
+            continue
+        members.sort(key=lambda position: (records[position]["year"], position))
+        kept = dict(records[members[0]])
+        kept["count"] = max(records[position]["count"] for position in members)
+        kept["source_urls"] = sorted(
+            {url for position in members for url in records[position]["source_urls"]}
+        )
+        kept["source_files"] = sorted({records[position]["source_file"] for position in members})
+        merged.append(kept)
+        cluster_id += 1
+        for rank, position in enumerate(members):
+            record = records[position]
+            report.append(
+                {
+                    "cluster": cluster_id,
+                    "action": "kept" if rank == 0 else "merged",
+                    "source_file": record["source_file"],
+                    "name": record["name"],
+                    "town": record["town"],
+                    "year": record["year"],
+                    "colony": record["colony"],
+                    "belief": record["belief"],
+                    "name_score": f"{scores.get(position, 1.0):.3f}",
+                    "source_url": "; ".join(record["source_urls"]),
+                }
+            )
+    return merged, report
+
+
+def write_duplicate_report(path: Path, report):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report)
+
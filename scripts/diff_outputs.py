@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from geojson_writer import iter_features
+
+SHARE_EPSILON = 0.005
+
+
+def digest(value) -> bytes:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest()
+
+
+def combine(hashes: dict) -> bytes:
+    combined = hashlib.blake2b(digest_size=8)
+    for name in sorted(hashes):
+        combined.update(name.encode("utf-8"))
+        combined.update(hashes[name])
+    return combined.digest()
+
+
+def feature_records(path: Path):
+    seen = {}
+    for feature in iter_features(path):
+        properties = dict(feature.get("properties") or {})
+        key = (properties.get("year"), properties.get("colony", properties.get("region")))
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        if occurrence:
+            key = key + (occurrence,)
+        properties["geometry"] = feature.get("geometry")
+        yield key, properties
+
+
+def timeline_records(path: Path):
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    years = payload.get("years", [])
+    for entry in payload.get("series", []):
+        belief = entry.get("belief_group")
+        for year, value in zip(years, entry.get("values", [])):
+            yield (year, belief), {"value": value}
+
+
+def index_records(records):
+    index = {}
+    for key, properties in records:
+        hashes = {name: digest(value) for name, value in properties.items()}
+        shares = properties.get("percentages")
+        index[key] = (combine(hashes), hashes, shares if isinstance(shares, dict) else None)
+    return index
+
+
+def share_moves(old_shares, new_shares):
+    moves = []
+    for belief in sorted(set(old_shares or {}) | set(new_shares or {})):
+        before = (old_shares or {}).get(belief, 0.0)
+        after = (new_shares or {}).get(belief, 0.0)
+        if abs(after - before) > SHARE_EPSILON:
+            moves.append({"belief": belief, "old": before, "new": after, "delta": round(after - before, 3)})
+    return moves
+
+
+def diff_records(old_records, new_records):
+    index = index_records(old_records)
+    added, changed = [], []
+    unchanged = 0
+    for key, properties in new_records:
+        hashes = {name: digest(value) for name, value in properties.items()}
+        previous = index.pop(key, None)
+        if previous is None:
+            added.append({"key": list(key), "dominant_belief": properties.get("dominant_belief")})
+            continue
+        old_digest, old_hashes, old_shares = previous
+        if old_digest == combine(hashes):
+            unchanged += 1
+            continue
+        names = sorted(
+            name
+            for name in set(hashes) | set(old_hashes)
+            if hashes.get(name) != old_hashes.get(name)
+        )
+        entry = {"key": list(key), "changed_properties": names}
+        shares = properties.get("percentages")
+        if "percentages" in names and isinstance(shares, dict):
+            entry["share_moves"] = share_moves(old_shares, shares)
+        changed.append(entry)
+    removed = [{"key": list(key)} for key in index]
+    return {
+        "summary": {
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "unchanged": unchanged,
+        },
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+    }
+
+
+def format_key(key):
+    return " / ".join(str(part) for part in key)
+
+
+def render_text(report, old_path: Path, new_path: Path, limit: int):
+    summary = report["summary"]
+    lines = [
+        f"--- {old_path}",
+        f"+++ {new_path}",
+        "added {added}, removed {removed}, changed {changed}, unchanged {unchanged}".format(**summary),
+    ]
+    for label, marker in (("added", "+"), ("removed", "-")):
+        for entry in report[label][:limit]:
+            lines.append(f"{marker} {format_key(entry['key'])}")
+        if len(report[label]) > limit:
+            lines.append(f"  ... {len(report[label]) - limit} more {label}")
+    for entry in report["changed"][:limit]:
+        lines.append(f"~ {format_key(entry['key'])}: {', '.join(entry['changed_properties'])}")
+        for move in entry.get("share_moves", []):
+            lines.append(
+                f"    {move['belief']}: {move['old']:.2f}% -> {move['new']:.2f}% ({move['delta']:+.2f})"
+            )
+    if len(report["changed"]) > limit:
+        lines.append(f"  ... {len(report['changed']) - limit} more changed")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Structural diff between two versions of a pipeline output (GeoJSON or timeline JSON)."
+    )
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--json", dest="json_out", type=Path, help="write the full report as JSON")
+    parser.add_argument("--limit", type=int, default=50, help="entries per section in the text report")
+    args = parser.parse_args()
+
+    for path in (args.old, args.new):
+        if not path.exists():
+            raise SystemExit(f"Missing {path}")
+    records = timeline_records if args.new.suffix == ".json" else feature_records
+    report = diff_records(records(args.old), records(args.new))
+
+    if args.json_out:
+        args.json_out.parent.mkdir(parents=True, exist_ok=True)
+        args.json_out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(render_text(report, args.old, args.new, args.limit))
+    summary = report["summary"]
+    sys.exit(1 if summary["added"] or summary["removed"] or summary["changed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+from contextlib import ExitStack
+from pathlib import Path
+
+FEATURE_INDENT = "    "
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+def _indented(value, prefix: str) -> str:
+    return json.dumps(value, indent=2).replace("\n", "\n" + prefix)
+
+
+def write_feature_collection(path: Path, features, metadata=None, ndjson_path: Path = None):
+    # Features are written one at a time as the iterable yields them, so memory
+    # stays flat no matter how many years or places are generated. `metadata`
+    # may be a callable; it is evaluated only after the last feature so it can
+    # summarize what was streamed. Output matches json.dumps(..., indent=2).
+    count = 0
+    with ExitStack() as stack:
+        handle = stack.enter_context(path.open("w", encoding="utf-8"))
+        lines = stack.enter_context(ndjson_path.open("w", encoding="utf-8")) if ndjson_path else None
+        handle.write('{\n  "type": "FeatureCollection",\n  "features": [')
+        for feature in features:
+            handle.write(",\n" if count else "\n")
+            handle.write(FEATURE_INDENT + _indented(feature, FEATURE_INDENT))
+            if lines:
+                lines.write(json.dumps(feature, separators=(",", ":"), ensure_ascii=False))
+                lines.write("\n")
+            count += 1
+        handle.write("\n  ]" if count else "]")
+        if callable(metadata):
+            metadata = metadata()
+        if metadata is not None:
+            handle.write(',\n  "metadata": ' + _indented(metadata, "  "))
+        handle.write("\n}")
+    return count
+
+
+def _iter_array_items(handle, buffer: str):
+    # Decode one array element at a time, refilling the buffer as needed, so a
+    # pretty-printed FeatureCollection never has to be held in memory at once.
+    position = 0
+    eof = False
+    while True:
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            chunk = handle.read(CHUNK_SIZE)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+        if position >= len(buffer) or buffer[position] == "]":
+            return
+        try:
+            item, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = handle.read(CHUNK_SIZE)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+            continue
+        yield item
+        position = end
+
+
+def iter_features(path: Path):
+    with path.open(encoding="utf-8") as handle:
+        if path.suffix in {".ndjson", ".geojsonl", ".jsonl"}:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+        buffer = ""
+        marker = '"features"'
+        while True:
+            chunk = handle.read(CHUNK_SIZE)
+            if not chunk:
+                raise SystemExit(f"{path} has no features array")
+            buffer += chunk
+            index = buffer.find(marker)
+            if index < 0:
+                buffer = buffer[-len(marker):]
+                continue
+            rest = buffer[index + len(marker):].lstrip(" \t\r\n:")
+            while not rest:
+                chunk = handle.read(CHUNK_SIZE)
+                if not chunk:
+                    raise SystemExit(f"{path} has no features array")
+                rest = chunk.lstrip(" \t\r\n:")
+            if rest[0] != "[":
+                raise SystemExit(f"{path}: 'features' is not an array")
+            yield from _iter_array_items(handle, rest[1:])
+            return
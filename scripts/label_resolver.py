@@ -0,0 +1,128 @@
+import csv
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+SIMILARITY_THRESHOLD = 0.85
+CANDIDATE_LIMIT = 8
+# Score given when every token of a known label appears in the raw label, e.g.
+# "East Jersey (New Jersey)" -> "New Jersey". It sits below the threshold on
+# purpose: "German Baptist (Dunker)" also contains "Baptist", so containment
+# alone only ever produces a suggestion for a curator to confirm.
+CONTAINMENT_SCORE = 0.8
+
+_non_alnum = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_label(label: str) -> str:
+    ascii_label = unicodedata.normalize("NFKD", label).encode("ascii", "ignore").decode("ascii")
+    return _non_alnum.sub(" ", ascii_label.casefold()).strip()
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LabelResolver:
+    # Maps raw source labels onto canonical names: exact lookup in the mapping
+    # file, then a case/punctuation/word-order insensitive lookup, then the
+    # closest known label if it clears the threshold (a trigram index narrows
+    # the comparison to a few candidates).
+    # Each distinct raw label is resolved once and memoized, so cost grows with
+    # the number of distinct labels rather than the number of rows.
+
+    def __init__(self, mapping: dict, name: str, targets=(), threshold: float = SIMILARITY_THRESHOLD):
+        self.mapping = mapping
+        self.targets = set(mapping.values()) | set(targets)
+        self.name = name
+        self.threshold = threshold
+        self.cache = {}
+        self.occurrences = Counter()
+        self.normalized = {}
+        self.choices = []
+        self.index = defaultdict(list)
+        known = dict(mapping)
+        for target in self.targets:
+            known.setdefault(target, target)
+        for label, target in known.items():
+            normalized = normalize_label(label)
+            self.normalized.setdefault(" ".join(sorted(normalized.split())), target)
+            position = len(self.choices)
+            self.choices.append((normalized, set(normalized.split()), target))
+            for gram in trigrams(normalized):
+                self.index[gram].append(position)
+
+    def resolve(self, label: str) -> str:
+        key = label.strip()
+        self.occurrences[key] += 1
+        if key not in self.cache:
+            self.cache[key] = self._lookup(key)
+        return self.cache[key][0]
+
+    def _lookup(self, key: str):
+        if not key or key in self.mapping:
+            return self.mapping.get(key, key), "exact", 1.0, ""
+        if key in self.targets:
+            return key, "exact", 1.0, ""
+        normalized = normalize_label(key)
+        target = self.normalized.get(" ".join(sorted(normalized.split())))
+        if target:
+            return target, "normalized", 1.0, target
+        best_target, best_score = self._closest(normalized)
+        if best_target and best_score >= self.threshold:
+            return best_target, "fuzzy", best_score, best_target
+        return key, "unmapped", best_score, best_target or ""
+
+    def _closest(self, normalized: str):
+        tokens = set(normalized.split())
+        shared = Counter()
+        for gram in trigrams(normalized):
+            for position in self.index.get(gram, ()):
+                shared[position] += 1
+        best_target, best_rank = "", (0.0, 0)
+        for position, _ in shared.most_common(CANDIDATE_LIMIT):
+            choice, choice_tokens, target = self.choices[position]
+            score = SequenceMatcher(None, normalized, choice).ratio()
+            if choice_tokens and choice_tokens <= tokens:
+                score = CONTAINMENT_SCORE
+            elif len(choice_tokens) != len(tokens):
+                # An added or missing word is a different label, not a typo
+                score = min(score, CONTAINMENT_SCORE)
+            rank = (round(score, 3), len(choice_tokens))
+            if rank > best_rank:
+                best_target, best_rank = target, rank
+        return best_target, best_rank[0]
+
+    def suggestions(self):
+        rows = []
+        for key, (target, method, score, suggested) in sorted(self.cache.items()):
+            if method == "exact":
+                continue
+            rows.append(
+                {
+                    "mapping": self.name,
+                    "source_label": key,
+                    "suggested_target": suggested,
+                    "applied": target if method != "unmapped" else "",
+                    "method": method,
+                    "score": f"{score:.3f}",
+                    "occurrences": self.occurrences[key],
+                }
+            )
+        return rows
+
+
+def write_suggestions(path: Path, resolvers):
+    rows = [row for resolver in resolvers for row in resolver.suggestions()]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(
+            handle,
+            fieldnames=["mapping", "source_label", "suggested_target", "applied", "method", "score", "occurrences"],
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
@@ -40,7 +40,7 @@ DENOM_MAP = {
 EXCLUDE_LABELS = {"TOTAL PROTESTANTS"}
 
 
-def read_table(path: Path, value_field: str, percent: bool = False):
+def read_table(path: Path, value_field: str, percent: bool = False, mapping: dict = DENOM_MAP):
     data = {}
     with path.open(newline="", encoding="utf-8") as handle:
         reader = csv.DictReader(handle)
@@ -49,7 +49,7 @@ def read_table(path: Path, value_field: str, percent: bool = False):
             label_upper = raw_label.upper()
             if label_upper in EXCLUDE_LABELS or raw_label == "Notes":
                 continue
-            canonical = DENOM_MAP.get(raw_label, raw_label)
+            canonical = mapping.get(raw_label, raw_label)
             number = row.get(value_field, "").strip()
             if not number:
                 continue
@@ -1,8 +1,14 @@
+import argparse
 import csv
 import json
+import shutil
 from collections import defaultdict
 from pathlib import Path
 
+from dedupe_congregations import dedupe_records, write_duplicate_report
+from geojson_writer import write_feature_collection
+from label_resolver import LabelResolver, write_suggestions
+
 RAW_DIR = Path("data/raw/pre1776_foundings")
 DENMAP_PATH = Path("data/mappings/denomination_map.csv")
 COLMAP_PATH = Path("data/mappings/colony_map.csv")
@@ -10,6 +16,9 @@ FINKe_TABLE3 = Path("data/raw/finke_stark_1776_table3_denominational_profiles.cs
 TABLE2_SUMMARY = Path("data/raw/finke_stark_1776_table2_membership_rates.csv")
 OUT_TIMELINE = Path("data/processed/pre1776_foundings_timeline.json")
 OUT_COLONY = Path("data/processed/pre1776_colony_profiles.geojson")
+OUT_COLONY_NDJSON = Path("data/processed/pre1776_colony_profiles.geojsonl")
+OUT_SUGGESTIONS = Path("data/processed/pre1776_label_suggestions.csv")
+OUT_DUPLICATES = Path("data/processed/pre1776_duplicate_report.csv")
 PUBLIC_TIMELINE = Path("web/public/data/pre1776_foundings_timeline.json")
 PUBLIC_COLONY = Path("web/public/data/pre1776_colony_profiles.geojson")
 
@@ -34,6 +43,10 @@ COLONY_COORDS = {
     "Georgia": (-83.753, 32.165),
 }
 
+# Each founding file names its entity and place columns differently
+NAME_FIELDS = ("entity_name", "church_name", "meeting_name", "parish_name", "community_or_church")
+TOWN_FIELDS = ("town", "town_or_city", "town_or_region", "town_or_settlement", "county_or_city")
+
 
 def load_map(path: Path, src: str, dest: str):
     mapping = {}
@@ -48,6 +61,8 @@ def load_map(path: Path, src: str, dest: str):
 
 den_map = load_map(DENMAP_PATH, "source_label", "belief_group")
 col_map = load_map(COLMAP_PATH, "source_colony", "destination_colony")
+belief_resolver = LabelResolver(den_map, DENMAP_PATH.name)
+colony_resolver = LabelResolver(col_map, COLMAP_PATH.name, targets=COLONY_COORDS)
 
 
 class FoundingData:
@@ -58,25 +73,22 @@ class FoundingData:
         self.all_beliefs = set()
         self.all_colonies = set()
 
-    def add_record(self, year: int, colony: str, belief: str, count: float, source_url: str):
+    def add_record(self, year: int, colony: str, belief: str, count: float, source_urls):
         if count <= 0:
             return
         self.increments[year][colony][belief] += count
-        if source_url:
-            self.sources[year][colony].add(source_url)
+        self.sources[year][colony].update(url for url in source_urls if url)
         self.all_years.add(year)
         self.all_beliefs.add(belief)
         self.all_colonies.add(colony)
 
 
 def canonical_belief(label: str) -> str:
-    key = label.strip()
-    return den_map.get(key, key)
+    return belief_resolver.resolve(label)
 
 
 def canonical_colony(label: str) -> str:
-    key = label.strip()
-    return col_map.get(key, key)
+    return colony_resolver.resolve(label)
 
 
 def parse_metric_value(value: str) -> float:
@@ -86,7 +98,15 @@ def parse_metric_value(value: str) -> float:
         return 0.0
 
 
-def ingest_raw_files(storage: FoundingData):
+def first_field(row, fields):
+    for field in fields:
+        value = (row.get(field) or "").strip()
+        if value:
+            return value
+    return ""
+
+
+def read_raw_records():
     if not RAW_DIR.exists():
         raise SystemExit("Missing data/raw/pre1776_foundings directory")
 
@@ -117,29 +137,48 @@ def ingest_raw_files(storage: FoundingData):
                 colony = canonical_colony(row.get("colony", "").strip())
                 if not colony:
                     continue
-                belief = canonical_belief(row.get("belief_group", "").strip())
+                source_label = row.get("belief_group", "").strip()
+                belief = canonical_belief(source_label)
                 if not belief:
                     continue
-                count = parse_metric_value(row.get("metric_value", "1"))
                 source_url = (row.get("source_url") or "").strip()
-                storage.add_record(year, colony, belief, count, source_url)
+                yield {
+                    "year": year,
+                    "colony": colony,
+                    "belief": belief,
+                    "source_label": source_label,
+                    "count": parse_metric_value(row.get("metric_value", "1")),
+                    "name": first_field(row, NAME_FIELDS),
+                    "town": first_field(row, TOWN_FIELDS),
+                    "source_file": path.name,
+                    "source_urls": [source_url] if source_url else [],
+                }
 
 
-def build_cumulative_snapshots(storage: FoundingData):
-    years_sorted = sorted(storage.all_years)
-    snapshots = {}
-    cumulative = defaultdict(lambda: defaultdict(float))
+def ingest_raw_files(storage: FoundingData):
+    # The same congregation can be listed in several compilations; merge those
+    # before counting and hand back the duplicate report rows.
+    records, duplicates = dedupe_records(list(read_raw_records()))
+    for record in records:
+        storage.add_record(
+            record["year"], record["colony"], record["belief"], record["count"], record["source_urls"]
+        )
+    return duplicates
 
-    for year in years_sorted:
+
+def iter_cumulative_snapshots(storage: FoundingData):
+    cumulative = defaultdict(lambda: defaultdict(float))
+    for year in sorted(storage.all_years):
         for colony, belief_counts in storage.increments[year].items():
             for belief, value in belief_counts.items():
                 cumulative[colony][belief] += value
-        # Deep copy the current cumulative state for the year
-        snapshot = {}
-        for colony, belief_counts in cumulative.items():
-            snapshot[colony] = dict(belief_counts)
-        snapshots[year] = snapshot
-    return years_sorted, snapshots
+        # Copy the current cumulative state so consumers may hold on to it
+        yield year, {colony: dict(belief_counts) for colony, belief_counts in cumulative.items()}
+
+
+def build_cumulative_snapshots(storage: FoundingData):
+    snapshots = dict(iter_cumulative_snapshots(storage))
+    return sorted(snapshots), snapshots
 
 
 def load_finke_1776_percentages():
@@ -209,11 +248,22 @@ def make_breakdown(counts, percentages):
         count = counts.get(belief, 0)
         share = percentages.get(belief, 0.0)
         breakdown.append({"belief": belief, "count": round(count), "share": round(share, 3)})
-    breakdown.sort(key=lambda item: item["share"], reverse=True)
+    # Name breaks share ties so the order does not depend on set iteration
+    breakdown.sort(key=lambda item: (-item["share"], item["belief"]))
     return breakdown
 
 
-def build_timeline_json(years_sorted, snapshots):
+def build_timeline_json(snapshots):
+    years_sorted = []
+    year_totals = {}
+    for year, snapshot in snapshots:
+        totals = defaultdict(float)
+        for colony_counts in snapshot.values():
+            for belief, count in colony_counts.items():
+                totals[belief] += count
+        years_sorted.append(year)
+        year_totals[year] = totals
+
     if not years_sorted:
         return {
             "years": [],
@@ -222,16 +272,8 @@ def build_timeline_json(years_sorted, snapshots):
             "source": "Pre-1776 founding compilations",
         }
 
-    beliefs = sorted({belief for snapshot in snapshots.values() for colony in snapshot.values() for belief in colony})
-    series = {belief: [] for belief in beliefs}
-
-    for year in years_sorted:
-        year_totals = defaultdict(float)
-        for colony_counts in snapshots[year].values():
-            for belief, count in colony_counts.items():
-                year_totals[belief] += count
-        for belief in beliefs:
-            series[belief].append(year_totals.get(belief, 0.0))
+    beliefs = sorted({belief for totals in year_totals.values() for belief in totals})
+    series = {belief: [year_totals[year].get(belief, 0.0) for year in years_sorted] for belief in beliefs}
 
     extended_years = list(years_sorted)
     if extended_years and extended_years[-1] < 1776:
@@ -252,11 +294,29 @@ def build_timeline_json(years_sorted, snapshots):
     }
 
 
-def build_colony_feature_collection(storage: FoundingData, years_sorted, snapshots):
-    features = []
-    metadata_sources = set()
-    for year in years_sorted:
-        snapshot = snapshots[year]
+def colony_feature(year: int, colony: str, counts: dict, percentages: dict, source: str, source_urls):
+    dominant_belief = max(percentages.items(), key=lambda item: item[1])[0]
+    dominant_share = percentages[dominant_belief]
+    coords = COLONY_COORDS[colony]
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [coords[0], coords[1]]},
+        "properties": {
+            "year": year,
+            "colony": colony,
+            "dominant_belief": dominant_belief,
+            "dominant_share": round(dominant_share, 2),
+            "percentages": {k: round(v, 2) for k, v in percentages.items()},
+            "counts": {k: round(v) for k, v in counts.items()},
+            "breakdown": make_breakdown(counts, percentages),
+            "source": source,
+            "source_urls": source_urls,
+        },
+    }
+
+
+def iter_founding_features(storage: FoundingData, snapshots, metadata_sources: set):
+    for year, snapshot in snapshots:
         for colony, belief_counts in snapshot.items():
             totalsum = sum(belief_counts.values())
             if totalsum <= 0 or colony not in COLONY_COORDS:
@@ -270,81 +330,83 @@ def build_colony_feature_collection(storage: FoundingData, years_sorted, snapsho
                 percentages[belief] = (count / totalsum) * 100
             if not percentages:
                 continue
-            dominant_belief = max(percentages.items(), key=lambda item: item[1])[0]
-            dominant_share = percentages[dominant_belief]
-            coords = COLONY_COORDS[colony]
-            source_urls = sorted(storage.sources.get(year, {}).get(colony, []))
-            metadata_sources.update(storage.sources.get(year, {}).get(colony, []))
-            features.append(
-                {
-                    "type": "Feature",
-                    "geometry": {"type": "Point", "coordinates": [coords[0], coords[1]]},
-                    "properties": {
-                        "year": year,
-                        "colony": colony,
-                        "dominant_belief": dominant_belief,
-                        "dominant_share": round(dominant_share, 2),
-                        "percentages": {k: round(v, 2) for k, v in percentages.items()},
-                        "counts": {k: round(v) for k, v in counts.items()},
-                        "breakdown": make_breakdown(counts, percentages),
-                        "source": "Pre-1776 founding compilations",
-                        "source_urls": source_urls,
-                    },
-                }
+            year_sources = storage.sources.get(year, {}).get(colony, [])
+            metadata_sources.update(year_sources)
+            yield colony_feature(
+                year, colony, counts, percentages, "Pre-1776 founding compilations", sorted(year_sources)
             )
-    # Append 1776 snapshot from Finke & Stark
+
+
+def iter_finke_1776_features():
     finke_percentages = load_finke_1776_percentages()
     finke_totals = load_finke_totals()
-    if finke_percentages:
-        for colony, percentages in finke_percentages.items():
-            if colony not in COLONY_COORDS or not percentages:
-                continue
-            total_congregations = finke_totals.get(colony, 0)
-            counts = {}
-            if total_congregations:
-                for belief, percent in percentages.items():
-                    counts[belief] = total_congregations * (percent / 100.0)
-            dominant_belief = max(percentages.items(), key=lambda item: item[1])[0]
-            dominant_share = percentages[dominant_belief]
-            coords = COLONY_COORDS[colony]
-            features.append(
-                {
-                    "type": "Feature",
-                    "geometry": {"type": "Point", "coordinates": [coords[0], coords[1]]},
-                    "properties": {
-                        "year": 1776,
-                        "colony": colony,
-                        "dominant_belief": dominant_belief,
-                        "dominant_share": round(dominant_share, 2),
-                        "percentages": {k: round(v, 2) for k, v in percentages.items()},
-                        "counts": {k: round(v) for k, v in counts.items()},
-                        "breakdown": make_breakdown(counts, percentages),
-                        "source": "Finke & Stark (1776 tables)",
-                        "source_urls": ["https://www.jstor.org/stable/3710731"],
-                    },
-                }
-            )
+    for colony, percentages in finke_percentages.items():
+        if colony not in COLONY_COORDS or not percentages:
+            continue
+        total_congregations = finke_totals.get(colony, 0)
+        counts = {}
+        if total_congregations:
+            for belief, percent in percentages.items():
+                counts[belief] = total_congregations * (percent / 100.0)
+        yield colony_feature(
+            1776,
+            colony,
+            counts,
+            percentages,
+            "Finke & Stark (1776 tables)",
+            ["https://www.jstor.org/stable/3710731"],
+        )
+
+
+def iter_colony_features(storage: FoundingData, snapshots, metadata_sources: set):
+    yield from iter_founding_features(storage, snapshots, metadata_sources)
+    # Append 1776 snapshot from Finke & Stark
+    yield from iter_finke_1776_features()
+
 
+def colony_metadata(metadata_sources: set):
     return {
-        "type": "FeatureCollection",
-        "features": features,
-        "metadata": {
-            "description": "Cumulative congregational founding shares by colony and year (1607-1776)",
-            "sources": sorted(metadata_sources),
-        },
+        "description": "Cumulative congregational founding shares by colony and year (1607-1776)",
+        "sources": sorted(metadata_sources),
     }
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Build pre-1776 founding timeline and colony profiles.")
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help=f"also write newline-delimited features to {OUT_COLONY_NDJSON}",
+    )
+    args = parser.parse_args()
+
     storage = FoundingData()
-    ingest_raw_files(storage)
-    years_sorted, snapshots = build_cumulative_snapshots(storage)
+    duplicates = ingest_raw_files(storage)
+    write_duplicate_report(OUT_DUPLICATES, duplicates)
+    if duplicates:
+        clusters = len({row["cluster"] for row in duplicates})
+        print(f"Merged {len(duplicates) - clusters} duplicate congregation record(s); see {OUT_DUPLICATES}")
 
-    timeline_payload = build_timeline_json(years_sorted, snapshots)
-    colony_feature_collection = build_colony_feature_collection(storage, years_sorted, snapshots)
+    timeline_payload = build_timeline_json(iter_cumulative_snapshots(storage))
+    timeline_json = json.dumps(timeline_payload, indent=2)
+    OUT_TIMELINE.write_text(timeline_json, encoding="utf-8")
+    PUBLIC_TIMELINE.write_text(timeline_json, encoding="utf-8")
 
-    OUT_TIMELINE.write_text(json.dumps(timeline_payload, indent=2), encoding="utf-8")
-    OUT_COLONY.write_text(json.dumps(colony_feature_collection, indent=2), encoding="utf-8")
-    PUBLIC_TIMELINE.write_text(json.dumps(timeline_payload, indent=2), encoding="utf-8")
-    PUBLIC_COLONY.write_text(json.dumps(colony_feature_collection, indent=2), encoding="utf-8")
+    metadata_sources = set()
+    write_feature_collection(
+        OUT_COLONY,
+        iter_colony_features(storage, iter_cumulative_snapshots(storage), metadata_sources),
+        metadata=lambda: colony_metadata(metadata_sources),
+        ndjson_path=OUT_COLONY_NDJSON if args.ndjson else None,
+    )
+    shutil.copyfile(OUT_COLONY, PUBLIC_COLONY)
+
+    suggestions = write_suggestions(OUT_SUGGESTIONS, [belief_resolver, colony_resolver])
+    unmapped = sum(1 for row in suggestions if row["method"] == "unmapped")
+    if suggestions:
+        print(f"{len(suggestions)} label(s) not in the mapping files ({unmapped} left unmapped); see {OUT_SUGGESTIONS}")
     print("Wrote pre-1776 founding datasets to processed/ and public data directories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import math
+import re
+import struct
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from geojson_writer import iter_features
+
+PROFILES = Path("data/processed/pre1776_colony_profiles.geojson")
+BELIEF_COLORS = Path("web/src/data/beliefColors.ts")
+OUT_DIR = Path("data/processed/frames")
+FRAME_CACHE = OUT_DIR / "cache"
+HASHES = FRAME_CACHE / "hashes.json"
+
+# Bump when the drawing code changes so every cached frame is redrawn
+RENDER_VERSION = 1
+FRAME_WIDTH = 192
+FRAME_HEIGHT = 216
+BOUNDS = (-85.5, 30.5, -66.5, 47.5)  # west, south, east, north
+BACKGROUND = (248, 250, 252)
+STROKE = (15, 23, 42)
+STROKE_ALPHA = 0.55
+STROKE_WIDTH = 1.2
+FILL_ALPHA = 0.92
+FALLBACK_COLOR = "#94a3b8"
+# Same share -> radius ramp as the MapLibre layer (0% -> 6px, 25%+ -> 20px),
+# scaled down to the frame size
+RADIUS_STOPS = ((0.0, 6.0), (25.0, 20.0))
+RADIUS_SCALE = 0.5
+ALL_FILTER = "all"
+
+
+def parse_belief_colors(path: Path):
+    text = path.read_text(encoding="utf-8")
+    block = re.search(r"COLOR_SCALE[^=]*=\s*\{(.*?)\};", text, re.S)
+    if not block:
+        raise SystemExit(f"Could not find COLOR_SCALE in {path}")
+    colors = {}
+    for key, value in re.findall(r'"?([^":\n]+?)"?\s*:\s*"(#[0-9a-fA-F]{6})"', block.group(1)):
+        colors[key.strip()] = value
+    return colors
+
+
+def hex_to_rgb(value: str):
+    return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "-", name.lower()).strip("-")
+
+
+def load_years(path: Path):
+    years = defaultdict(list)
+    for feature in iter_features(path):
+        properties = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        coordinates = geometry.get("coordinates")
+        if "year" not in properties or not coordinates:
+            continue
+        years[properties["year"]].append(
+            {
+                "coordinates": coordinates[:2],
+                "dominant_belief": properties.get("dominant_belief", ""),
+                "dominant_share": properties.get("dominant_share", 0.0),
+                "percentages": properties.get("percentages", {}),
+            }
+        )
+    return years
+
+
+def frame_points(items, belief_filter: str, colors):
+    points = []
+    for item in items:
+        if belief_filter == ALL_FILTER:
+            color = colors.get(item["dominant_belief"], colors.get("Other", FALLBACK_COLOR))
+            share = item["dominant_share"]
+        else:
+            color = colors.get(belief_filter, colors.get("Other", FALLBACK_COLOR))
+            share = item["percentages"].get(belief_filter, 0.0)
+        points.append((item["coordinates"][0], item["coordinates"][1], color, share))
+    return points
+
+
+def frame_hash(points) -> str:
+    payload = json.dumps([RENDER_VERSION, FRAME_WIDTH, FRAME_HEIGHT, points], separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def radius_for(share: float) -> float:
+    (low_share, low_radius), (high_share, high_radius) = RADIUS_STOPS
+    share = min(max(share, low_share), high_share)
+    fraction = (share - low_share) / (high_share - low_share)
+    return (low_radius + fraction * (high_radius - low_radius)) * RADIUS_SCALE
+
+
+def blend(pixels, offset: int, color, alpha: float):
+    for channel in range(3):
+        pixels[offset + channel] = round(color[channel] * alpha + pixels[offset + channel] * (1 - alpha))
+
+
+def render_frame(points):
+    pixels = bytearray(bytes(BACKGROUND) * (FRAME_WIDTH * FRAME_HEIGHT))
+    west, south, east, north = BOUNDS
+    stroke = STROKE_WIDTH * RADIUS_SCALE
+    for lon, lat, color, share in points:
+        cx = (lon - west) / (east - west) * FRAME_WIDTH
+        cy = (north - lat) / (north - south) * FRAME_HEIGHT
+        radius = radius_for(share)
+        fill = hex_to_rgb(color)
+        for y in range(max(0, math.floor(cy - radius)), min(FRAME_HEIGHT, math.ceil(cy + radius) + 1)):
+            for x in range(max(0, math.floor(cx - radius)), min(FRAME_WIDTH, math.ceil(cx + radius) + 1)):
+                distance = math.hypot(x + 0.5 - cx, y + 0.5 - cy)
+                if distance > radius:
+                    continue
+                offset = (y * FRAME_WIDTH + x) * 3
+                if distance > radius - stroke:
+                    blend(pixels, offset, STROKE, STROKE_ALPHA)
+                else:
+                    blend(pixels, offset, fill, FILL_ALPHA)
+    return bytes(pixels)
+
+
+def write_png(path: Path, width: int, height: int, pixels: bytes):
+    def chunk(kind: bytes, data: bytes):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    stride = width * 3
+    raw = b"".join(b"\x00" + pixels[row * stride:(row + 1) * stride] for row in range(height))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def read_png(path: Path) -> bytes:
+    # Only reads frames written by write_png (8-bit RGB, no row filters)
+    data = path.read_bytes()
+    position = 8
+    idat = b""
+    width = height = 0
+    while position < len(data):
+        length = struct.unpack(">I", data[position:position + 4])[0]
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            width, height = struct.unpack(">II", body[:8])
+        elif kind == b"IDAT":
+            idat += body
+        position += 12 + length
+    raw = zlib.decompress(idat)
+    stride = width * 3
+    return b"".join(raw[row * (stride + 1) + 1:(row + 1) * (stride + 1)] for row in range(height))
+
+
+def pack_sheet(frames, columns: int):
+    rows = math.ceil(len(frames) / columns)
+    width, height = columns * FRAME_WIDTH, rows * FRAME_HEIGHT
+    sheet = bytearray(bytes(BACKGROUND) * (width * height))
+    stride = FRAME_WIDTH * 3
+    for index, pixels in enumerate(frames):
+        left = (index % columns) * FRAME_WIDTH
+        top = (index // columns) * FRAME_HEIGHT
+        for row in range(FRAME_HEIGHT):
+            start = ((top + row) * width + left) * 3
+            sheet[start:start + stride] = pixels[row * stride:(row + 1) * stride]
+    return width, height, bytes(sheet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render per-year colony map frames and pack them into sprite sheets.")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--columns", type=int, default=16, help="frames per sprite sheet row")
+    parser.add_argument("--force", action="store_true", help="re-render every frame")
+    args = parser.parse_args()
+
+    if not PROFILES.exists():
+        raise SystemExit(f"Missing {PROFILES}; run scripts/prepare_pre1776_foundings.py first.")
+    colors = parse_belief_colors(BELIEF_COLORS)
+    years = load_years(PROFILES)
+    beliefs = sorted({belief for items in years.values() for item in items for belief in item["percentages"]})
+    filters = [ALL_FILTER] + beliefs
+
+    previous = {} if args.force or not HASHES.exists() else json.loads(HASHES.read_text(encoding="utf-8"))
+    hashes = {}
+    pending = []
+    for belief_filter in filters:
+        for year in sorted(years):
+            points = frame_points(years[year], belief_filter, colors)
+            key = f"{slug(belief_filter)}/{year}"
+            hashes[key] = frame_hash(points)
+            if previous.get(key) != hashes[key] or not (FRAME_CACHE / f"{key}.png").exists():
+                pending.append((key, points))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            rendered = pool.map(render_frame, [points for _, points in pending], chunksize=8)
+            for (key, _), pixels in zip(pending, rendered):
+                write_png(FRAME_CACHE / f"{key}.png", FRAME_WIDTH, FRAME_HEIGHT, pixels)
+    HASHES.write_text(json.dumps(hashes, indent=2, sort_keys=True), encoding="utf-8")
+
+    index = {
+        "frame_width": FRAME_WIDTH,
+        "frame_height": FRAME_HEIGHT,
+        "columns": args.columns,
+        "bounds": list(BOUNDS),
+        "years": sorted(years),
+        "sheets": {},
+    }
+    for belief_filter in filters:
+        name = slug(belief_filter)
+        frames = [read_png(FRAME_CACHE / name / f"{year}.png") for year in sorted(years)]
+        width, height, sheet = pack_sheet(frames, args.columns)
+        write_png(OUT_DIR / f"sprite_{name}.png", width, height, sheet)
+        index["sheets"][belief_filter] = {
+            "file": f"sprite_{name}.png",
+            "frames": {
+                str(year): [(position % args.columns) * FRAME_WIDTH, (position // args.columns) * FRAME_HEIGHT]
+                for position, year in enumerate(sorted(years))
+            },
+        }
+    (OUT_DIR / "index.json").write_text(json.dumps(index, indent=2), encoding="utf-8")
+    print(
+        f"Rendered {len(pending)} of {len(hashes)} frame(s) ({len(filters)} filter(s) x {len(years)} year(s)); "
+        f"wrote sprite sheets and {OUT_DIR / 'index.json'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import csv
+from collections import defaultdict
+from pathlib import Path
+
+from geojson_writer import write_feature_collection
+from prepare_pre1776_foundings import (
+    FINKe_TABLE3,
+    FoundingData,
+    build_cumulative_snapshots,
+    canonical_belief,
+    ingest_raw_files,
+    load_finke_1776_percentages,
+    load_finke_totals,
+    make_breakdown,
+)
+
+REGION_MAP = Path("data/mappings/region_map.csv")
+OUT_REGIONS = Path("data/processed/pre1776_region_profiles.geojson")
+
+NATIONAL = "National"
+REGION_COORDS = {
+    "New England": (-71.6, 43.4),
+    "Middle Colonies": (-75.6, 40.4),
+    "Southern Colonies": (-80.2, 35.0),
+    NATIONAL: (-76.5, 39.5),
+}
+PUBLISHED_REGION_COLUMNS = {
+    "NEW_ENGLAND": "New England",
+    "MIDDLE_COLONIES": "Middle Colonies",
+    "SOUTHERN_COLONIES": "Southern Colonies",
+}
+# Table 3 is rounded to 0.1 points per colony, so region shares recomputed
+# from the colony columns drift slightly from the published region columns.
+CHECK_TOLERANCE = 1.0
+
+
+def load_hierarchy(path: Path):
+    hierarchy = {}
+    if not path.exists():
+        raise SystemExit(f"Missing {path}")
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            colony = (row.get("colony") or "").strip()
+            if not colony:
+                continue
+            hierarchy[colony] = [
+                value.strip()
+                for value in (row.get("region"), row.get("national"))
+                if value and value.strip()
+            ]
+    return hierarchy
+
+
+# Sparse 0/1 matrix in CSR layout: one row per region/national target, listing
+# the colony columns that roll up into it.
+def build_aggregation_matrix(colonies, hierarchy):
+    members = defaultdict(list)
+    for column, colony in enumerate(colonies):
+        # Colonies missing from the hierarchy still count toward the national row
+        for parent in hierarchy.get(colony) or [NATIONAL]:
+            members[parent].append(column)
+    targets = sorted(members, key=lambda name: (name == NATIONAL, name))
+    indptr = [0]
+    indices = []
+    for target in targets:
+        indices.extend(members[target])
+        indptr.append(len(indices))
+    return targets, indptr, indices
+
+
+def apply_matrix(matrix, array, width: int):
+    targets, indptr, indices = matrix
+    result = []
+    for row in range(len(targets)):
+        totals = [0.0] * width
+        for column in indices[indptr[row]:indptr[row + 1]]:
+            for position, value in enumerate(array[column]):
+                totals[position] += value
+        result.append(totals)
+    return result
+
+
+def yearly_colony_counts(storage: FoundingData):
+    years_sorted, snapshots = build_cumulative_snapshots(storage)
+    counts_by_year = {year: snapshots[year] for year in years_sorted}
+
+    finke_percentages = load_finke_1776_percentages()
+    finke_totals = load_finke_totals()
+    finke_counts = {}
+    for colony, percentages in finke_percentages.items():
+        total = finke_totals.get(colony, 0)
+        if total:
+            finke_counts[colony] = {
+                belief: total * (percent / 100.0) for belief, percent in percentages.items()
+            }
+    if finke_counts:
+        counts_by_year[1776] = finke_counts
+    return counts_by_year, finke_totals
+
+
+def rollup(counts_by_year, hierarchy):
+    colonies = sorted({colony for snapshot in counts_by_year.values() for colony in snapshot})
+    beliefs = sorted(
+        {belief for snapshot in counts_by_year.values() for counts in snapshot.values() for belief in counts}
+    )
+    matrix = build_aggregation_matrix(colonies, hierarchy)
+    targets = matrix[0]
+
+    rollups = {}
+    for year in sorted(counts_by_year):
+        snapshot = counts_by_year[year]
+        array = [
+            [snapshot.get(colony, {}).get(belief, 0.0) for belief in beliefs]
+            for colony in colonies
+        ]
+        aggregated = apply_matrix(matrix, array, len(beliefs))
+        rollups[year] = {
+            target: {belief: value for belief, value in zip(beliefs, row) if value > 0}
+            for target, row in zip(targets, aggregated)
+        }
+    unmapped = [colony for colony in colonies if colony not in hierarchy]
+    return rollups, unmapped
+
+
+def region_feature(year: int, name: str, counts: dict, members):
+    total = sum(counts.values())
+    percentages = {belief: (count / total) * 100 for belief, count in counts.items()}
+    dominant_belief = max(percentages.items(), key=lambda item: item[1])[0]
+    coords = REGION_COORDS.get(name)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [coords[0], coords[1]]} if coords else None,
+        "properties": {
+            "year": year,
+            "region": name,
+            "level": "national" if name == NATIONAL else "region",
+            "member_colonies": members,
+            "congregations_total": round(total),
+            "dominant_belief": dominant_belief,
+            "dominant_share": round(percentages[dominant_belief], 2),
+            "percentages": {k: round(v, 2) for k, v in percentages.items()},
+            "counts": {k: round(v) for k, v in counts.items()},
+            "breakdown": make_breakdown(counts, percentages),
+            "source": "Finke & Stark (1776 tables)" if year == 1776 else "Pre-1776 founding compilations",
+        },
+    }
+
+
+def load_published_region_percentages():
+    published = {region: defaultdict(float) for region in PUBLISHED_REGION_COLUMNS.values()}
+    if not FINKe_TABLE3.exists():
+        return published
+    with FINKe_TABLE3.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            belief = canonical_belief(row.get("denomination", "").strip())
+            if not belief:
+                continue
+            for column, region in PUBLISHED_REGION_COLUMNS.items():
+                try:
+                    published[region][belief] += float((row.get(column) or "").strip())
+                except ValueError:
+                    continue
+    return published
+
+
+def check_1776_regions(region_counts, finke_totals):
+    published = load_published_region_percentages()
+    checks = []
+    for region, published_shares in published.items():
+        counts = region_counts.get(region, {})
+        total = sum(counts.values())
+        expected_total = finke_totals.get(region, 0)
+        if expected_total and abs(total - expected_total) >= 0.5:
+            checks.append(
+                {"region": region, "belief": "TOTAL", "computed": round(total, 1), "published": expected_total}
+            )
+        for belief in sorted(set(published_shares) | set(counts)):
+            computed = (counts.get(belief, 0.0) / total) * 100 if total else 0.0
+            expected = published_shares.get(belief, 0.0)
+            if abs(computed - expected) > CHECK_TOLERANCE:
+                checks.append(
+                    {
+                        "region": region,
+                        "belief": belief,
+                        "computed": round(computed, 2),
+                        "published": expected,
+                    }
+                )
+    return checks
+
+
+def iter_region_features(rollups, counts_by_year, hierarchy):
+    for year, targets in rollups.items():
+        for name, counts in targets.items():
+            if not counts:
+                continue
+            members = sorted(
+                colony
+                for colony, colony_counts in counts_by_year[year].items()
+                if sum(colony_counts.values()) > 0
+                and name in (hierarchy.get(colony) or [NATIONAL])
+            )
+            yield region_feature(year, name, counts, members)
+
+
+def main():
+    hierarchy = load_hierarchy(REGION_MAP)
+    storage = FoundingData()
+    ingest_raw_files(storage)
+    counts_by_year, finke_totals = yearly_colony_counts(storage)
+    rollups, unmapped = rollup(counts_by_year, hierarchy)
+
+    mismatches = check_1776_regions(rollups.get(1776, {}), finke_totals)
+    for mismatch in mismatches:
+        print(
+            "1776 check: {region} {belief} computed {computed} vs published {published}".format(**mismatch)
+        )
+    if unmapped:
+        print(f"Colonies missing from {REGION_MAP} (counted nationally only): {', '.join(unmapped)}")
+
+    write_feature_collection(
+        OUT_REGIONS,
+        iter_region_features(rollups, counts_by_year, hierarchy),
+        metadata={
+            "description": "Region and national congregational founding shares by year (1607-1776), rolled up from colony counts",
+            "hierarchy": str(REGION_MAP),
+            "unmapped_colonies": unmapped,
+            "check_1776": {"tolerance": CHECK_TOLERANCE, "mismatches": mismatches},
+            "generated_by": "scripts/rollup_regions.py",
+        },
+    )
+    print(f"Wrote {OUT_REGIONS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import csv
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from build_compositions import MANIFEST, STATE_CODES, iter_profile_records, load_manifest, load_state_codes
+from dedupe_congregations import dedupe_records
+from geojson_writer import write_feature_collection
+from prepare_congregation_timeline import DENOM_MAP, TABLE1, TABLE5, read_table
+from prepare_pre1776_foundings import (
+    COLONY_COORDS,
+    FoundingData,
+    build_timeline_json,
+    canonical_belief,
+    colony_feature,
+    colony_metadata,
+    iter_cumulative_snapshots,
+    iter_founding_features,
+    load_finke_totals,
+    read_raw_records,
+)
+
+SCENARIO_DIR = Path("data/mappings/scenarios")
+OUT_DIR = Path("data/processed/scenarios")
+BASELINE = "baseline"
+
+
+class LabelCube:
+    # Everything the pipelines count, held once at the raw source-label level.
+    # Labels are integer codes; a scenario is just a code -> group remapping.
+    # Vectors are (code, value) pairs kept in the source's own order, so a
+    # remapped group appears where the pipeline first saw it and ties between
+    # groups resolve exactly as they do in the published outputs.
+
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+        self.storage = FoundingData()
+        self.foundings = []
+        self.finke_percentages = {}
+        self.finke_counts = {}
+        self.national = {}
+
+    def code(self, label: str) -> int:
+        if label not in self.codes:
+            self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return self.codes[label]
+
+    def vector(self, values: dict):
+        return [(self.code(label), value) for label, value in values.items()]
+
+
+def load_cube():
+    cube = LabelCube()
+    records, _ = dedupe_records(list(read_raw_records()))
+    for record in records:
+        cube.storage.add_record(
+            record["year"], record["colony"], record["source_label"], record["count"], record["source_urls"]
+        )
+    snapshots = list(iter_cumulative_snapshots(cube.storage))
+
+    state_names, _ = load_state_codes(STATE_CODES)
+    finke_totals = load_finke_totals()
+    percentages = defaultdict(dict)
+    for snapshot in load_manifest(MANIFEST, {1776}):
+        for _, colony, label, percent in iter_profile_records(snapshot, state_names, {1776}):
+            if percent > 0:
+                percentages[colony][label] = percentages[colony].get(label, 0.0) + percent
+
+    national = {
+        1776: read_table(TABLE1, "number", mapping={}),
+        1850: read_table(TABLE5, "1850_Number", mapping={}),
+    }
+
+    cube.foundings = [
+        (year, {colony: cube.vector(counts) for colony, counts in snapshot.items()})
+        for year, snapshot in snapshots
+    ]
+    for colony, values in percentages.items():
+        total = finke_totals.get(colony, 0)
+        cube.finke_percentages[colony] = cube.vector(values)
+        cube.finke_counts[colony] = cube.vector(
+            {label: total * (percent / 100.0) for label, percent in values.items()} if total else {}
+        )
+    cube.national = {year: cube.vector(values) for year, values in national.items()}
+    return cube
+
+
+def load_scenarios(names=None):
+    scenarios = {BASELINE: {}}
+    paths = sorted(SCENARIO_DIR.glob("*.csv"))
+    unknown = sorted(set(names or ()) - {path.stem for path in paths} - {BASELINE})
+    if unknown:
+        raise SystemExit(f"No scenario file in {SCENARIO_DIR} for: {', '.join(unknown)}")
+    for path in paths:
+        if names and path.stem not in names:
+            continue
+        with path.open(newline="", encoding="utf-8") as handle:
+            scenarios[path.stem] = {
+                row["source_label"].strip(): row["belief_group"].strip() for row in csv.DictReader(handle)
+            }
+    return scenarios
+
+
+def national_belief(label: str) -> str:
+    return DENOM_MAP.get(label, label)
+
+
+def build_remap(cube: LabelCube, overrides: dict, baseline=canonical_belief):
+    # Overrides may name a raw label or a baseline group ("Huguenot" folds
+    # every Huguenot spelling at once). `baseline` is the grouping the
+    # pipeline itself applies, so the empty scenario reproduces its output.
+    groups = []
+    group_codes = {}
+    remap = []
+    for label in cube.labels:
+        base = baseline(label)
+        group = overrides.get(label, overrides.get(base, base))
+        if group not in group_codes:
+            group_codes[group] = len(groups)
+            groups.append(group)
+        remap.append(group_codes[group])
+    return groups, remap
+
+
+def apply_remap(vector, remap, groups):
+    totals = {}
+    for code, value in vector:
+        if value:
+            group = groups[remap[code]]
+            totals[group] = totals.get(group, 0.0) + value
+    return {group: value for group, value in totals.items() if value}
+
+
+def scenario_outputs(cube: LabelCube, overrides: dict):
+    groups, remap = build_remap(cube, overrides)
+    # The national tables are grouped by prepare_congregation_timeline.py's
+    # own mapping, which folds the small sects into "Other"
+    national_groups, national_remap = build_remap(cube, overrides, national_belief)
+    snapshots = [
+        (year, {colony: apply_remap(vector, remap, groups) for colony, vector in snapshot.items()})
+        for year, snapshot in cube.foundings
+    ]
+    timeline = build_timeline_json(snapshots)
+
+    finke = {}
+    for colony in cube.finke_percentages:
+        finke[colony] = (
+            apply_remap(cube.finke_counts[colony], remap, groups),
+            apply_remap(cube.finke_percentages[colony], remap, groups),
+        )
+
+    national = {
+        year: apply_remap(vector, national_remap, national_groups) for year, vector in cube.national.items()
+    }
+    beliefs = sorted({belief for values in national.values() for belief in values})
+    congregation_timeline = {
+        "years": sorted(national),
+        "series": [
+            {"belief_group": belief, "values": [national[year].get(belief, 0.0) for year in sorted(national)]}
+            for belief in beliefs
+        ],
+        "metric": "congregations",
+        "source": "Finke & Stark (1989)",
+        "documentation_url": "https://www.jstor.org/stable/3710731",
+    }
+    return snapshots, timeline, finke, congregation_timeline
+
+
+def iter_scenario_features(cube: LabelCube, snapshots, finke, metadata_sources: set):
+    yield from iter_founding_features(cube.storage, snapshots, metadata_sources)
+    for colony, (counts, percentages) in finke.items():
+        if colony not in COLONY_COORDS or not percentages:
+            continue
+        yield colony_feature(
+            1776,
+            colony,
+            counts,
+            percentages,
+            "Finke & Stark (1776 tables)",
+            ["https://www.jstor.org/stable/3710731"],
+        )
+
+
+def summarize(finke, timeline, congregation_timeline):
+    summary = defaultdict(dict)
+    counts_1776 = defaultdict(float)
+    for counts, _ in finke.values():
+        for belief, count in counts.items():
+            counts_1776[belief] += count
+    total_1776 = sum(counts_1776.values())
+    for belief, count in counts_1776.items():
+        summary[belief]["share_1776"] = round(count / total_1776 * 100, 2) if total_1776 else 0.0
+    for entry in timeline["series"]:
+        summary[entry["belief_group"]]["founded_by_1776"] = entry["values"][-1] if entry["values"] else 0.0
+    for entry in congregation_timeline["series"]:
+        summary[entry["belief_group"]]["congregations_1850"] = entry["values"][-1]
+    return summary
+
+
+def write_comparison(path: Path, summaries):
+    metrics = ("share_1776", "founded_by_1776", "congregations_1850")
+    names = list(summaries)
+    beliefs = sorted({belief for summary in summaries.values() for belief in summary})
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["metric", "belief_group", *names])
+        for metric in metrics:
+            for belief in beliefs:
+                values = [summaries[name].get(belief, {}).get(metric, "") for name in names]
+                if any(value != "" for value in values):
+                    writer.writerow([metric, belief, *values])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild timelines and colony profiles under alternative belief mappings.")
+    parser.add_argument("scenario", nargs="*", help=f"scenario names from {SCENARIO_DIR} (default: all)")
+    args = parser.parse_args()
+
+    cube = load_cube()
+    scenarios = load_scenarios(set(args.scenario))
+    summaries = {}
+    for name, overrides in scenarios.items():
+        snapshots, timeline, finke, congregation_timeline = scenario_outputs(cube, overrides)
+
+        destination = OUT_DIR / name
+        destination.mkdir(parents=True, exist_ok=True)
+        (destination / "pre1776_foundings_timeline.json").write_text(json.dumps(timeline, indent=2), encoding="utf-8")
+        (destination / "congregation_timeline.json").write_text(
+            json.dumps(congregation_timeline, indent=2), encoding="utf-8"
+        )
+        metadata_sources = set()
+        write_feature_collection(
+            destination / "pre1776_colony_profiles.geojson",
+            iter_scenario_features(cube, snapshots, finke, metadata_sources),
+            metadata=lambda: dict(colony_metadata(metadata_sources), scenario=name, overrides=overrides),
+        )
+        summaries[name] = summarize(finke, timeline, congregation_timeline)
+        print(f"{name}: {len(summaries[name])} belief groups from {len(cube.labels)} source labels")
+
+    write_comparison(OUT_DIR / "comparison.csv", summaries)
+    print(f"Wrote {len(scenarios)} scenario(s) and {OUT_DIR / 'comparison.csv'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from dedupe_congregations import dedupe_records  # noqa: E402
+
+# (belief, name, town, other name, other town, expected duplicate)
+KNOWN_PAIRS = [
+    ("Congregationalist", "First Church of Boston", "Boston", "Second Church of Boston", "Boston", False),
+    ("Congregationalist", "First Church in Salem", "Salem", "First Church in Dedham", "Dedham", False),
+    ("Congregationalist", "First Church in Salem", "Salem", "First Church of Salem", "Salem", True),
+    ("Quaker", "Falls Monthly Meeting", "Falls", "Falls Preparative Meeting", "Falls", False),
+    ("Quaker", "Chester Monthly Meeting", "Chester", "Chichester Monthly Meeting", "Chichester", False),
+    ("Catholic", "St. Mary's Catholic Church", "Philadelphia", "St. Joseph's Catholic Church", "Philadelphia", False),
+    (
+        "Huguenot",
+        "Huguenot Church of Charleston",
+        "Charleston",
+        "French Protestant (Huguenot) Church of Charleston",
+        "Charleston (Berkeley County)",
+        True,
+    ),
+    ("Congregationalist", "First Church", "Boston", "First Church", "Charlestown", False),
+    ("Episcopalian/Anglican", "Christ Church", "Boston", "Christ Church", "Philadelphia", False),
+    ("Episcopalian/Anglican", "Trinity Church", "Newport", "Trinity Church", "Boston", False),
+    ("Congregationalist", "Congregational Church", "Dedham", "Congregational Church", "Salem", False),
+    ("Congregationalist", "First Church", "Dedham", "Congregational Church", "Dedham", True),
+]
+
+
+def record(name, town, year, belief, source_file):
+    return {
+        "name": name,
+        "town": town,
+        "year": year,
+        "colony": "Massachusetts Bay",
+        "belief": belief,
+        "count": 1.0,
+        "source_file": source_file,
+        "source_urls": [f"https://example.org/{source_file}"],
+    }
+
+
+@pytest.mark.parametrize("belief, name, town, other_name, other_town, expected", KNOWN_PAIRS)
+def test_known_pairs(belief, name, town, other_name, other_town, expected):
+    records = [
+        record(name, town, 1700, belief, "a.csv"),
+        record(other_name, other_town, 1705, belief, "b.csv"),
+    ]
+    merged, report = dedupe_records(records)
+    assert len(merged) == (1 if expected else 2)
+    assert len(report) == (2 if expected else 0)
+
+
+def test_merged_record_keeps_every_source():
+    records = [
+        record("First Church of Boston", "Boston", 1630, "Congregationalist", "a.csv"),
+        record("First Church", "Boston", 1632, "Congregationalist", "b.csv"),
+        record("First Church of Boston", "", 1635, "Congregationalist", "c.csv"),
+    ]
+    merged, report = dedupe_records(records)
+    assert len(merged) == 1
+    assert merged[0]["year"] == 1630
+    assert merged[0]["source_files"] == ["a.csv", "b.csv", "c.csv"]
+    assert [row["action"] for row in report] == ["kept", "merged", "merged"]
+
+
+def test_window_limits_candidates():
+    records = [
+        record("First Church of Boston", "Boston", 1630, "Congregationalist", "a.csv"),
+        record("First Church of Boston", "Boston", 1650, "Congregationalist", "b.csv"),
+    ]
+    merged, _ = dedupe_records(records)
+    assert len(merged) == 2